@@ -2,18 +2,22 @@
 [AUDIT]
 # FILE: database/context_manager.py
 # ROLE: JSON Database Handler (The Bunker).
-# VERSION: 2.7 (Restoration & Sync Optimized)
-# LAST_CHANGE: Updated assign_to_kid to return full lib_item for robust JS media-type switching.
+# VERSION: 2.8 (Bedtime Scheduler Hooks)
+# LAST_CHANGE: Added set_night_mode/update_schedule for the Bedtime Scheduler; writers now share an RLock so
+#              background transitions and request threads cannot corrupt or tear a save.
 """
 
 import json
 import os
 import time
 import re
+import threading
 
 class ContextManager:
     def __init__(self, db_path='database/context-map.json'):
         self.db_path = db_path
+        # Re-entrant: writers call save() while already holding it. The scheduler thread takes it too.
+        self.lock = threading.RLock()
         self.data = self._load()
 
     # [BLOCK: DB_IO]
@@ -48,13 +52,14 @@ class ContextManager:
 
     def save(self):
         """Writes current state to disk."""
-        try:
-            with open(self.db_path, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, indent=4)
-            return True
-        except Exception as e:
-            print(f"[❌] Failed to save Bunker: {e}")
-            return False
+        with self.lock:
+            try:
+                with open(self.db_path, 'w', encoding='utf-8') as f:
+                    json.dump(self.data, f, indent=4)
+                return True
+            except Exception as e:
+                print(f"[❌] Failed to save Bunker: {e}")
+                return False
 
     def get_data(self, key=None):
         """Helper to retrieve raw data or specific keys used by routes."""
@@ -66,17 +71,29 @@ class ContextManager:
     # [BLOCK: STATUS_CONTROLS]
     def reset_all_statuses(self):
         """Cleanup session states on server restart."""
-        for kid_id in self.data.get('kids', {}):
-            self.data['kids'][kid_id]['status'] = "offline"
-        self.save()
+        with self.lock:
+            for kid_id in self.data.get('kids', {}):
+                self.data['kids'][kid_id]['status'] = "offline"
+            self.save()
 
     def update_status(self, kid_id, status):
         """Updates online/offline visibility."""
-        if kid_id in self.data.get('kids', {}):
-            self.data['kids'][kid_id]['status'] = status
-            self.save()
-            return True
-        return False
+        with self.lock:
+            if kid_id in self.data.get('kids', {}):
+                self.data['kids'][kid_id]['status'] = status
+                self.save()
+                return True
+            return False
+
+    def set_night_mode(self, kid_id, enabled):
+        """Persists the day/night flag used by the portal overlay and dashboard buttons."""
+        with self.lock:
+            kid = self.get_kid(kid_id)
+            if not kid:
+                return False
+            if 'settings' not in kid: kid['settings'] = {}
+            kid['settings']['night_mode'] = bool(enabled)
+            return self.save()
     # [/BLOCK: STATUS_CONTROLS]
 
     # [BLOCK: LIBRARY_LOGIC]
@@ -86,58 +103,60 @@ class ContextManager:
 
     def add_to_library(self, name, source_url):
         """Cleans YouTube IDs and detects Content Type."""
-        content_type = "video"
-        content_id = ""
-
-        if 'list=' in source_url:
-            content_id = source_url.split('list=')[-1].split('&')[0]
-            content_type = "playlist"
-        else:
-            match = re.search(r"(?:v=|\/)([a-zA-Z0-9_-]{11})", source_url)
-            content_id = match.group(1) if match else source_url
+        with self.lock:
             content_type = "video"
-
-        lib_id = f"lib_{int(time.time())}"
-        self.data['library'][lib_id] = {
-            "name": name,
-            "url": content_id,
-            "type": content_type,
-            "added_at": time.strftime("%Y-%m-%d %H:%M:%S")
-        }
-        return self.save()
+            content_id = ""
+
+            if 'list=' in source_url:
+                content_id = source_url.split('list=')[-1].split('&')[0]
+                content_type = "playlist"
+            else:
+                match = re.search(r"(?:v=|\/)([a-zA-Z0-9_-]{11})", source_url)
+                content_id = match.group(1) if match else source_url
+                content_type = "video"
+
+            lib_id = f"lib_{int(time.time())}"
+            self.data['library'][lib_id] = {
+                "name": name,
+                "url": content_id,
+                "type": content_type,
+                "added_at": time.strftime("%Y-%m-%d %H:%M:%S")
+            }
+            return self.save()
 
     def assign_to_kid(self, kid_id, mode, library_id):
         """
         Syncs library item to a kid and returns (Success, Library_Item).
         RESTORED: Returns the full dict so the Parent Route knows the type (playlist vs video).
         """
-        kid = self.get_kid(kid_id)
-        if not kid:
-            return False, "Kid not found"
-
-        # Handle un-assignment (empty string)
-        if library_id == "" or library_id is None:
-            if 'playlists' not in kid: kid['playlists'] = {"day": "", "night": ""}
-            kid['playlists'][mode] = ""
-            self.save()
-            return True, {"url": "", "type": "video"}
-
-        if library_id in self.data.get('library', {}):
-            lib_item = self.data['library'][library_id]
-
-            # Ensure playlist structure exists
-            if 'playlists' not in kid: kid['playlists'] = {"day": "", "night": ""}
-            kid['playlists'][mode] = library_id
-
-            # Update active playback context for persistence across reboots
-            kid['playback']['current_video'] = lib_item['url']
-            kid['playback']['media_type'] = lib_item['type']
-
-            self.save()
-            print(f"[🔗] Bunker Sync: {kid['name']} ({mode}) -> {lib_item['type']} {lib_item['url']}")
-            return True, lib_item
-
-        return False, "Library item not found in database"
+        with self.lock:
+            kid = self.get_kid(kid_id)
+            if not kid:
+                return False, "Kid not found"
+
+            # Handle un-assignment (empty string)
+            if library_id == "" or library_id is None:
+                if 'playlists' not in kid: kid['playlists'] = {"day": "", "night": ""}
+                kid['playlists'][mode] = ""
+                self.save()
+                return True, {"url": "", "type": "video"}
+
+            if library_id in self.data.get('library', {}):
+                lib_item = self.data['library'][library_id]
+
+                # Ensure playlist structure exists
+                if 'playlists' not in kid: kid['playlists'] = {"day": "", "night": ""}
+                kid['playlists'][mode] = library_id
+
+                # Update active playback context for persistence across reboots
+                kid['playback']['current_video'] = lib_item['url']
+                kid['playback']['media_type'] = lib_item['type']
+
+                self.save()
+                print(f"[🔗] Bunker Sync: {kid['name']} ({mode}) -> {lib_item['type']} {lib_item['url']}")
+                return True, lib_item
+
+            return False, "Library item not found in database"
     # [/BLOCK: LIBRARY_LOGIC]
 
     # [BLOCK: KID_DATA_MGMT]
@@ -149,20 +168,31 @@ class ContextManager:
 
     def add_kid(self, kid_id, name, age, bedtime, wakeup):
         """Initializes a kid profile with the V2.5 schema."""
-        self.data['kids'][kid_id] = {
-            "name": name,
-            "age": age,
-            "bedtime": bedtime,
-            "wakeup": wakeup,
-            "status": "offline",
-            "playback": {
-                "current_video": "5qap5aO4i9A",
-                "media_type": "video",
-                "volume": 80,
-                "is_paused": False
-            },
-            "playlists": {"day": "", "night": ""},
-            "settings": {"night_mode": False}
-        }
-        return self.save()
+        with self.lock:
+            self.data['kids'][kid_id] = {
+                "name": name,
+                "age": age,
+                "bedtime": bedtime,
+                "wakeup": wakeup,
+                "status": "offline",
+                "playback": {
+                    "current_video": "5qap5aO4i9A",
+                    "media_type": "video",
+                    "volume": 80,
+                    "is_paused": False
+                },
+                "playlists": {"day": "", "night": ""},
+                "settings": {"night_mode": False}
+            }
+            return self.save()
+
+    def update_schedule(self, kid_id, bedtime, wakeup):
+        """Edits the bedtime/wakeup pair ("HH:MM") of an existing profile."""
+        with self.lock:
+            kid = self.get_kid(kid_id)
+            if not kid:
+                return False
+            kid['bedtime'] = bedtime
+            kid['wakeup'] = wakeup
+            return self.save()
     # [/BLOCK: KID_DATA_MGMT]
\ No newline at end of file
@@ -2,13 +2,12 @@
 # [AUDIT]
 # FILE: routes/kid.py
 # ROLE: Route handler for the kid portal.
-# LAST_CHANGE: Fixed Jinja2 500 error by passing kid_data to render_template.
+# LAST_CHANGE: Shares the extensions bridge DB so scheduler-driven playlist/mode changes are visible on load.
 
 from flask import Blueprint, render_template, abort
-from database.context_manager import ContextManager
+from extensions import db
 
 kid_bp = Blueprint('kid', __name__)
-db = ContextManager()
 
 
 @kid_bp.route('/portal/<kid_id>')
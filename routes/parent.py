@@ -2,17 +2,17 @@
 [AUDIT]
 # FILE: routes/parent.py
 # ROLE: Handling Parent UI routes, serving Vault images, and Library management.
-# VERSION: 2.8 (Corrected Sync Relay)
-# LAST_CHANGE: Updated assign_library to return the actual YouTube URL/ID instead of the DB Key.
+# VERSION: 2.9 (Bedtime Scheduler Sync)
+# LAST_CHANGE: Enrollment and schedule edits are validated with scheduler.validate_schedule before saving.
 """
 
 from flask import Blueprint, render_template, request, url_for, send_from_directory, jsonify
-from database.context_manager import ContextManager
+from extensions import db
+from routes import scheduler
 import uuid
 import os
 
 parent_bp = Blueprint('parent', __name__)
-db = ContextManager()
 
 
 # [BLOCK: ENROLLMENT_LOGIC]
@@ -27,8 +27,23 @@ def enroll():
         bedtime = request.form.get('bedtime')
         wakeup = request.form.get('wakeup')
 
+        # Reject schedules the Bedtime Scheduler could not act on
+        schedule_error = scheduler.validate_schedule(bedtime, wakeup)
+        if schedule_error:
+            return f"""
+            <body style="font-family:sans-serif; background:#0f172a; color:white; text-align:center; padding:50px;">
+                <div style="background:#1e293b; display:inline-block; padding:30px; border-radius:15px; border:1px solid #334155;">
+                    <h2 style="color:#ef4444;">⚠️ Enrollment Failed</h2>
+                    <p>{schedule_error}</p>
+                    <br>
+                    <a href="/parent/enroll" style="background:#38bdf8; color:#0f172a; padding:10px 20px; text-decoration:none; border-radius:8px; font-weight:bold;">Try Again</a>
+                </div>
+            </body>
+            """, 400
+
         # Persist to Bunker
         db.add_kid(kid_id, name, age, bedtime, wakeup)
+        scheduler.reschedule(kid_id)
 
         # Generate portal link
         portal_url = url_for('kid.kid_portal', kid_id=kid_id, _external=True)
@@ -105,6 +120,47 @@ def assign_library():
 # [/BLOCK: LIBRARY_API_HANDLERS]
 
 
+# [BLOCK: SCHEDULE_API_HANDLERS]
+@parent_bp.route('/api/kid/schedule', methods=['POST'])
+def update_schedule():
+    """
+    Edits a child's bedtime/wakeup ("HH:MM") and re-queues their next Day/Night transition.
+    If the new window changes the current mode, the tablet is switched immediately.
+    """
+    try:
+        data = request.json
+        kid_id = data.get('kid_id')
+        bedtime = data.get('bedtime')
+        wakeup = data.get('wakeup')
+
+        if not kid_id or not bedtime or not wakeup:
+            return jsonify({"status": "error", "message": "Missing required fields"}), 400
+
+        # Reject anything the scheduler could not act on (bad "HH:MM" or bedtime == wakeup)
+        schedule_error = scheduler.validate_schedule(bedtime, wakeup)
+        if schedule_error:
+            return jsonify({"status": "error", "message": schedule_error}), 400
+
+        if not db.update_schedule(kid_id, bedtime, wakeup):
+            return jsonify({"status": "error", "message": "Kid not found"}), 404
+
+        scheduler.reschedule(kid_id)
+        print(f"[⏰] Schedule updated for {kid_id}: {bedtime} -> {wakeup}")
+
+        kid = db.get_kid(kid_id)
+        return jsonify({
+            "status": "success",
+            "bedtime": bedtime,
+            "wakeup": wakeup,
+            "night_mode": kid.get('settings', {}).get('night_mode', False)
+        })
+
+    except Exception as e:
+        print(f"[❌] Schedule Update Error: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+# [/BLOCK: SCHEDULE_API_HANDLERS]
+
+
 # [BLOCK: VAULT_SERVICE]
 @parent_bp.route('/vault/<filename>')
 def serve_vault(filename):
@@ -0,0 +1,255 @@
+# [BLOCK: BEDTIME_SCHEDULER]
+"""
+[AUDIT]
+# FILE: routes/scheduler.py
+# ROLE: Server-side Bedtime/Wakeup engine (Day/Night auto switching).
+# VERSION: 1.2 (Event-Driven Heap)
+# LAST_CHANGE: Loop now sleeps until the heap head (woken early when an edit becomes
+#              the new head), survives per-kid errors, and uses never-repeating versions.
+#              Added validate_schedule (strict "HH:MM") for enrollment/schedule edits.
+# NOTE: bedtime/wakeup are read as naive SERVER-LOCAL time (datetime.now()).
+#       On a host running in UTC, "20:00" means 20:00 UTC.
+"""
+
+import heapq
+import itertools
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+
+from extensions import socketio, db
+
+# [BLOCK: SCHEDULER_STATE]
+# Heap entries: (fire_ts, version, kid_id). Every push takes a fresh global version
+# (never reused, even after unschedule), so stale entries are skipped lazily on pop
+# instead of searched for (O(log n)).
+# _lock guards heap state only; kid data is guarded by db.lock. Never nest them.
+_heap = []
+_versions = {}
+_seq = itertools.count(1)
+_lock = threading.Lock()
+_wake = None
+_started = False
+
+# Safety net only: the loop sleeps until the heap head, but re-checks at least this
+# often in case the host was suspended and the monotonic wait overshoots.
+MAX_SLEEP = 300.0
+
+HHMM_PATTERN = re.compile(r'\d{2}:\d{2}')
+# [/BLOCK: SCHEDULER_STATE]
+
+
+# [BLOCK: TIME_HELPERS]
+def _parse_hhmm(value):
+    """Converts a strict "HH:MM" string into minutes since midnight. Returns None if unusable."""
+    if not isinstance(value, str) or not HHMM_PATTERN.fullmatch(value):
+        return None
+    hours, minutes = int(value[:2]), int(value[3:])
+    if hours < 24 and minutes < 60:
+        return hours * 60 + minutes
+    return None
+
+
+def _get_window(kid):
+    """Returns (bedtime, wakeup) in minutes, or None if the kid has no valid schedule."""
+    bedtime = _parse_hhmm(kid.get('bedtime'))
+    wakeup = _parse_hhmm(kid.get('wakeup'))
+    if bedtime is None or wakeup is None or bedtime == wakeup:
+        return None
+    return bedtime, wakeup
+
+
+def validate_schedule(bedtime, wakeup):
+    """Returns an error message if the scheduler could not act on this pair, else None."""
+    if _parse_hhmm(bedtime) is None or _parse_hhmm(wakeup) is None:
+        return "Times must be HH:MM (00:00-23:59)"
+    if bedtime == wakeup:
+        return "Bedtime and wakeup cannot be the same"
+    return None
+
+
+def mode_at(kid, moment):
+    """Which mode ('day' / 'night') the schedule expects at the given datetime."""
+    window = _get_window(kid)
+    if not window:
+        return None
+    bedtime, wakeup = window
+    now_min = moment.hour * 60 + moment.minute
+    if bedtime < wakeup:
+        # Nap-style window inside a single day (e.g. 13:00 -> 15:00)
+        return 'night' if bedtime <= now_min < wakeup else 'day'
+    # Overnight window (e.g. 20:00 -> 07:00)
+    return 'night' if now_min >= bedtime or now_min < wakeup else 'day'
+
+
+def next_transition(kid, moment):
+    """Returns the datetime of the next bedtime/wakeup boundary strictly after 'moment'."""
+    window = _get_window(kid)
+    if not window:
+        return None
+    midnight = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    candidates = []
+    for minutes in window:
+        boundary = midnight + timedelta(minutes=minutes)
+        if boundary <= moment:
+            boundary += timedelta(days=1)
+        candidates.append(boundary)
+    return min(candidates)
+# [/BLOCK: TIME_HELPERS]
+
+
+# [BLOCK: HEAP_MGMT]
+def _push(kid_id, kid, moment):
+    """Invalidates any pending entry for the kid and queues its next boundary. Caller holds _lock."""
+    version = next(_seq)
+    _versions[kid_id] = version
+    fire_at = next_transition(kid, moment)
+    if fire_at:
+        entry = (fire_at.timestamp(), version, kid_id)
+        heapq.heappush(_heap, entry)
+        # New earliest transition: wake the loop so it re-arms its sleep
+        if _heap[0] is entry and _wake is not None:
+            _wake.set()
+
+    # Keep the heap from filling up with dead entries after many edits
+    if len(_heap) > 2 * len(_versions) + 16:
+        _heap[:] = [e for e in _heap if _versions.get(e[2]) == e[1]]
+        heapq.heapify(_heap)
+
+
+def reschedule(kid_id):
+    """
+    Call after a profile edit (enrollment, bedtime/wakeup change).
+    Recomputes the kid's next transition and applies the current mode if it changed.
+    """
+    kid = db.get_kid(kid_id)
+    with _lock:
+        if not kid:
+            _versions.pop(kid_id, None)
+            return False
+        _push(kid_id, kid, datetime.now())
+    _sync_mode(kid_id)
+    return True
+
+
+def unschedule(kid_id):
+    """Drops the kid from the scheduler; its heap entry is discarded on pop."""
+    with _lock:
+        _versions.pop(kid_id, None)
+# [/BLOCK: HEAP_MGMT]
+
+
+# [BLOCK: TRANSITION_LOGIC]
+def _sync_mode(kid_id):
+    """
+    Applies the expected mode only if the stored one disagrees (restart catch-up).
+    Check and apply share db.lock, so whichever of the loop / an edit gets there
+    second sees the mode already switched and does nothing.
+    """
+    with db.lock:
+        kid = db.get_kid(kid_id)
+        if not kid:
+            return False
+        # Mode expected *now*, so a late wake-up (host sleep) still lands correctly
+        expected = mode_at(kid, datetime.now())
+        if not expected:
+            return False
+        is_night = kid.get('settings', {}).get('night_mode', False)
+        if (expected == 'night') == is_night:
+            return False
+        return apply_mode(kid_id, expected)
+
+
+def apply_mode(kid_id, mode):
+    """
+    Switches the kid's active playlist via assign_to_kid and relays the change
+    to the tablet room as player_control commands (same format as parent_command).
+    Holds db.lock (re-entrant) so the whole switch lands as one unit.
+    """
+    with db.lock:
+        kid = db.get_kid(kid_id)
+        if not kid:
+            return False
+
+        is_night = (mode == 'night')
+        db.set_night_mode(kid_id, is_night)
+        print(f"[{'🌙' if is_night else '☀️'}] Scheduler: {kid.get('name', kid_id)} -> {mode.upper()} mode")
+
+        library_id = kid.get('playlists', {}).get(mode)
+        if library_id:
+            success, result = db.assign_to_kid(kid_id, mode, library_id)
+            if success:
+                socketio.emit('player_control', {
+                    'command': 'playlist_sync',
+                    'payload': {'video_id': result.get('url'), 'media_type': result.get('type')}
+                }, to=kid_id)
+            else:
+                print(f"[⚠️] Scheduler: {kid_id} {mode} playlist skipped ({result})")
+
+        socketio.emit('player_control', {
+            'command': 'switch_mode',
+            'payload': {'night_mode': is_night}
+        }, to=kid_id)
+        return True
+# [/BLOCK: TRANSITION_LOGIC]
+
+
+# [BLOCK: SCHEDULER_LOOP]
+def _pop_due(now_ts):
+    """Pops every live entry whose time has come. Returns their kid IDs."""
+    due = []
+    with _lock:
+        while _heap and _heap[0][0] <= now_ts:
+            _, version, kid_id = heapq.heappop(_heap)
+            if _versions.get(kid_id) == version:
+                due.append(kid_id)
+    return due
+
+
+def _run():
+    """Sleeps until the heap head is due (or an edit becomes the new head), then fires it."""
+    while True:
+        # Clear before reading the head: a push landing after this still wakes the wait
+        _wake.clear()
+
+        for kid_id in _pop_due(time.time()):
+            kid = db.get_kid(kid_id)
+            if not kid:
+                unschedule(kid_id)
+                continue
+            try:
+                _sync_mode(kid_id)
+            except Exception as e:
+                print(f"[❌] Scheduler Error ({kid_id}): {e}")
+            finally:
+                # Always re-queue, so one bad profile cannot drop out of the heap
+                with _lock:
+                    _push(kid_id, kid, datetime.now())
+
+        with _lock:
+            delay = (_heap[0][0] - time.time()) if _heap else MAX_SLEEP
+        _wake.wait(timeout=max(0.0, min(delay, MAX_SLEEP)))
+
+
+def start():
+    """Seeds the heap from every enrolled kid, catches up missed transitions, starts the loop."""
+    global _started, _wake
+    if _started:
+        return
+    _started = True
+
+    # Async-mode aware Event (threading or eventlet), so waits never block the hub
+    _wake = socketio.server.eio.create_event()
+
+    kids = db.get_all_kids()
+    for kid_id in list(kids):
+        try:
+            reschedule(kid_id)
+        except Exception as e:
+            print(f"[❌] Scheduler Error ({kid_id}): {e}")
+
+    print(f"[⏰] Bedtime Scheduler ACTIVE: {len(_versions)} kid(s) tracked")
+    socketio.start_background_task(_run)
+# [/BLOCK: SCHEDULER_LOOP]
+# [/BLOCK: BEDTIME_SCHEDULER]
\ No newline at end of file
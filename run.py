@@ -1,7 +1,7 @@
 # [AUDIT]
 # FILE: run.py
 # ROLE: Flask Application Entry Point
-# LAST_CHANGE: Fixed issubclass error by simplifying exports for Vercel.
+# LAST_CHANGE: Bedtime Scheduler boot skips the werkzeug reloader parent and Vercel serverless imports.
 
 from flask import Flask, redirect, url_for, send_from_directory
 import os
@@ -10,6 +10,7 @@ from extensions import socketio, db
 # [BLOCK: RUN_APP_CORE]
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'kiddie_secret_99'
+DEBUG = True
 
 # Initialize shared socket bridge
 socketio.init_app(app)
@@ -22,6 +23,7 @@ app.register_blueprint(kid_bp, url_prefix='/kid')
 
 # Import events
 import routes.socket_events
+from routes import scheduler
 # [/BLOCK: RUN_APP_CORE]
 
 # [BLOCK: MAIN_ROUTES]
@@ -34,5 +36,20 @@ def serve_vault_image(filename):
     return send_from_directory(os.path.join('database', 'vault'), filename)
 # [/BLOCK: MAIN_ROUTES]
 
+# [BLOCK: SCHEDULER_BOOT]
+# Started at import so gunicorn/eventlet ('run:app') workers get it too.
+# With debug=True, 'python run.py' forks a reloader: only its child serves, so the
+# parent must not own a timer heap (it would double-fire transitions).
+# Vercel (sets VERCEL=1) is serverless: no long-lived loop, read-only Bunker, no socket server.
+_is_reloader_parent = (__name__ == '__main__' and DEBUG
+                       and os.environ.get('WERKZEUG_RUN_MAIN') != 'true')
+if os.environ.get('VERCEL'):
+    print("[⏰] Bedtime Scheduler disabled on Vercel (serverless).")
+elif _is_reloader_parent:
+    print("[⏰] Bedtime Scheduler skipped in reloader parent (starts in serving child).")
+else:
+    scheduler.start()
+# [/BLOCK: SCHEDULER_BOOT]
+
 if __name__ == '__main__':
-    socketio.run(app, host='0.0.0.0', port=5000, debug=True, allow_unsafe_werkzeug=True)
\ No newline at end of file
+    socketio.run(app, host='0.0.0.0', port=5000, debug=DEBUG, allow_unsafe_werkzeug=True)
\ No newline at end of file